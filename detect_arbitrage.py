@@ -16,198 +16,269 @@ If product > 1.0: profit going A -> B -> C -> A
 If product < 1.0: profit going the reverse direction A -> C -> B -> A
 """
 
-import urllib.request
-import json
-from itertools import permutations
+import argparse
+import heapq
+import math
+from collections import deque
+from itertools import combinations
+
+from output import emit
+from rates_client import get_matrix
 
 # Currencies to analyze
 CURRENCIES = ["USD", "EUR", "GBP", "MXN", "JPY", "CHF", "CAD", "AUD"]
 
-def fetch_rates(base, targets):
-    """Fetch exchange rates from frankfurter.app"""
-    symbols = ",".join(targets)
-    url = f"https://api.frankfurter.dev/v1/latest?base={base}&symbols={symbols}"
-    req = urllib.request.Request(url, headers={"User-Agent": "Python/3"})
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        data = json.loads(resp.read().decode())
-    return data
-
-def build_rate_matrix(currencies):
-    """Build full NxN rate matrix by fetching rates for each base currency"""
-    matrix = {}
-    raw_data = {}
-
-    for base in currencies:
-        targets = [c for c in currencies if c != base]
-        print(f"  Fetching rates for base: {base}...")
-        data = fetch_rates(base, targets)
-        raw_data[base] = data
-
-        matrix[(base, base)] = 1.0
-        for target, rate in data["rates"].items():
-            if target in currencies:
-                matrix[(base, target)] = rate
-
-    return matrix, raw_data
-
-def find_triangular_arbitrage(currencies, matrix, starting_amount=10000):
+def find_triangular_arbitrage(currencies, matrix, starting_amount=10000, top_n=20):
     """
     Check all triangular paths for arbitrage.
-    For each permutation of 3 currencies (A, B, C):
+    For each set of 3 currencies (A, B, C), in both directions:
       Start with `starting_amount` of A
       Buy B with A
       Buy C with B
       Buy A with C
       Check if we end up with more than we started
-    """
-    results = []
-
-    for a, b, c in permutations(currencies, 3):
-        rate_ab = matrix.get((a, b))
-        rate_bc = matrix.get((b, c))
-        rate_ca = matrix.get((c, a))
 
-        if rate_ab is None or rate_bc is None or rate_ca is None:
-            continue
+    Rotations of a loop (A->B->C->A, B->C->A->B, ...) multiply the same
+    three rates, so each triangle is checked once per direction, starting
+    from its earliest currency: C(N,3) * 2 paths instead of N*(N-1)*(N-2).
+    The reverse direction uses the quoted reverse rates, which are not
+    exactly 1/product.
 
-        # Product of rates - should equal 1.0 if no arbitrage
-        product = rate_ab * rate_bc * rate_ca
-
-        # Simulate the trade
-        step1 = starting_amount * rate_ab      # A -> B
-        step2 = step1 * rate_bc                 # B -> C
-        step3 = step2 * rate_ca                 # C -> A (back to starting currency)
+    `matrix` is indexed by currency position, so the pass over all paths
+    is list indexing and two multiplies -- no tuple-keyed lookups. Only
+    the profit of each path is kept; result dicts are built just for the
+    `top_n` paths by absolute profit and the single best path.
 
-        profit = step3 - starting_amount
-        profit_pct = (profit / starting_amount) * 100
+    Returns (top, summary): `top` is the list of result dicts, largest
+    absolute profit first; `summary` holds the path count, profitable
+    count, profit % range and the best profitable path (or None).
+    """
+    n = len(currencies)
 
-        results.append({
+    paths = []
+    profits = []
+    for i, j, k in combinations(range(n), 3):
+        # Fetch each row once; both directions read their rates from these
+        ri, rj, rk = matrix[i], matrix[j], matrix[k]
+        for path, r1, r2, r3 in (((i, j, k), ri[j], rj[k], rk[i]),
+                                 ((i, k, j), ri[k], rk[j], rj[i])):
+            if r1 is None or r2 is None or r3 is None:
+                continue
+            # Simulate the trade: A -> B -> C -> A compounds to the loop product
+            paths.append(path)
+            profits.append(round(starting_amount * (r1 * r2 * r3) - starting_amount, 4))
+
+    def describe(p):
+        i, j, k = paths[p]
+        a, b, c = currencies[i], currencies[j], currencies[k]
+        # Product of rates - should equal 1.0 if no arbitrage
+        product = matrix[i][j] * matrix[j][k] * matrix[k][i]
+        end = starting_amount * product
+        profit = end - starting_amount
+        return {
             "path": f"{a} -> {b} -> {c} -> {a}",
             "product": product,
             "start": starting_amount,
-            "end": round(step3, 4),
+            "end": round(end, 4),
             "profit": round(profit, 4),
-            "profit_pct": round(profit_pct, 6),
+            "profit_pct": round((profit / starting_amount) * 100, 6),
             "rates": {
-                f"{a}->{b}": rate_ab,
-                f"{b}->{c}": rate_bc,
-                f"{c}->{a}": rate_ca,
+                f"{a}->{b}": matrix[i][j],
+                f"{b}->{c}": matrix[j][k],
+                f"{c}->{a}": matrix[k][i],
             }
-        })
+        }
+
+    top = [describe(p) for p in heapq.nlargest(top_n, range(len(paths)), key=lambda p: abs(profits[p]))]
 
-    # Sort by absolute profit descending
-    results.sort(key=lambda x: abs(x["profit"]), reverse=True)
-    return results
+    best = max(range(len(paths)), key=profits.__getitem__, default=None)
+    if best is not None and profits[best] <= 0:
+        best = None
+
+    summary = {
+        "paths": len(paths),
+        "profitable": sum(1 for p in profits if p > 0),
+        "min_pct": round(min(profits, default=0) / starting_amount * 100, 6),
+        "max_pct": round(max(profits, default=0) / starting_amount * 100, 6),
+        "best": describe(best) if best is not None else None,
+    }
+    return top, summary
+
+def _walk_cycle(pred, v, n):
+    """
+    Recover the cycle behind a negative-cycle detection at vertex v.
+    Stepping n predecessors back is guaranteed to land inside the cycle;
+    from there, follow pred until we return. Returns vertex indices in
+    trade order, or None if the predecessor chain runs out first.
+    """
+    x = v
+    for _ in range(n):
+        x = pred[x]
+        if x == -1:
+            return None
+
+    cycle = [x]
+    y = pred[x]
+    while y != x:
+        cycle.append(y)
+        y = pred[y]
+    cycle.reverse()
+    return cycle
+
+def _spfa(adj, n):
+    """
+    SPFA (queue-based Bellman-Ford) from a virtual super-source.
+    The super-source has a 0-weight edge to every vertex, so every
+    negative cycle is reachable in a single run -- starting with all
+    distances at 0 and every vertex queued is exactly that.
+    Only vertices whose distance just dropped get their edges re-scanned,
+    instead of relaxing every edge n-1 times. A shortest path that reaches
+    n edges can only exist through a negative cycle, so that is returned
+    as a list of vertex indices; None if there is no cycle.
+    """
+    dist = [0.0] * n
+    pred = [-1] * n
+    length = [0] * n
+    in_queue = [True] * n
+    queue = deque(range(n))
+
+    while queue:
+        u = queue.popleft()
+        in_queue[u] = False
+        du = dist[u]
+        for v, w in adj[u]:
+            d = du + w
+            if d < dist[v] - 1e-10:  # small epsilon for float comparison
+                dist[v] = d
+                pred[v] = u
+                length[v] = length[u] + 1
+                if length[v] >= n:
+                    cycle = _walk_cycle(pred, v, n)
+                    if cycle is not None:
+                        return cycle
+                if not in_queue[v]:
+                    # Small Label First: a better-than-front vertex jumps the queue
+                    if queue and d < dist[queue[0]]:
+                        queue.appendleft(v)
+                    else:
+                        queue.append(v)
+                    in_queue[v] = True
+
+    return None
 
 def find_negative_cycles_bellman_ford(currencies, matrix):
     """
     Bellman-Ford approach: convert to log space, find negative cycles.
     -log(rate) transforms multiplication into addition.
     A negative cycle in this space = an arbitrage opportunity.
+    Uses the SPFA variant of Bellman-Ford from a super-source, so one run
+    covers the whole graph and stops at the first cycle found. Returns a
+    list with that cycle (rotated to start at its earliest currency in
+    `currencies`), or an empty list if there is none.
     """
-    import math
-
     n = len(currencies)
-    idx = {c: i for i, c in enumerate(currencies)}
-
-    # Build edge list with -log(rate) weights
-    edges = []
-    for (src, dst), rate in matrix.items():
-        if src != dst and rate > 0:
-            weight = -math.log(rate)
-            edges.append((idx[src], idx[dst], weight, src, dst))
-
-    # Run Bellman-Ford from each source
-    cycles_found = []
-
-    for source in range(n):
-        dist = [float('inf')] * n
-        pred = [-1] * n
-        dist[source] = 0
-
-        # Relax edges n-1 times
-        for _ in range(n - 1):
-            for u, v, w, _, _ in edges:
-                if dist[u] + w < dist[v]:
-                    dist[v] = dist[u] + w
-                    pred[v] = u
-
-        # Check for negative cycles (one more relaxation)
-        for u, v, w, src_name, dst_name in edges:
-            if dist[u] + w < dist[v] - 1e-10:  # small epsilon for float comparison
-                cycles_found.append({
-                    "detected_at": f"{src_name} -> {dst_name}",
-                    "improvement": -(dist[u] + w - dist[v]),
-                    "source": currencies[source]
-                })
-
-    return cycles_found
+
+    # -log(rate) for every edge, computed once;
+    # currency names only come back in when a cycle is reported
+    weight = [
+        [-math.log(r) if u != v and r is not None and r > 0 else None for v, r in enumerate(row)]
+        for u, row in enumerate(matrix)
+    ]
+
+    # Adjacency lists of (dst, weight), laid out in currency order
+    # so results don't depend on fetch order
+    adj = [[(v, w) for v, w in enumerate(row) if w is not None] for row in weight]
+
+    cycle = _spfa(adj, n)
+    if cycle is None:
+        return []
+
+    start = cycle.index(min(cycle))
+    cycle = cycle[start:] + cycle[:start]
+    total = sum(weight[cycle[i - 1]][cycle[i]] for i in range(len(cycle)))
+
+    return [{
+        "cycle": [currencies[i] for i in cycle],
+        "improvement": -total,
+    }]
 
 def main():
-    print("=" * 70)
-    print("TRIANGULAR ARBITRAGE DETECTOR")
-    print("=" * 70)
-    print(f"\nCurrencies: {', '.join(CURRENCIES)}")
-    print(f"Possible triangular paths: {len(list(permutations(CURRENCIES, 3)))}")
+    parser = argparse.ArgumentParser(description="Triangular arbitrage detector")
+    parser.add_argument("--derive", action="store_true",
+                        help="fetch EUR rates once and derive all cross-rates by division")
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignore today's cached rates and re-fetch")
+    args = parser.parse_args()
+
+    emit(
+        "=" * 70,
+        "TRIANGULAR ARBITRAGE DETECTOR",
+        "=" * 70,
+        f"\nCurrencies: {', '.join(CURRENCIES)}",
+        f"Triangular paths checked: {2 * math.comb(len(CURRENCIES), 3)} (each triangle once per direction)",
+    )
 
     # Step 1: Fetch rates
     print("\n--- Fetching Live Rates ---")
-    matrix, raw_data = build_rate_matrix(CURRENCIES)
+    matrix, raw_data = get_matrix(CURRENCIES, derive=args.derive, refresh=args.refresh)
 
-    # Print the date of rates
+    # Print the date of rates and the rate matrix
     sample_date = list(raw_data.values())[0].get("date", "unknown")
-    print(f"\nRate date: {sample_date}")
-
-    # Print rate matrix
-    print("\n--- Exchange Rate Matrix ---")
-    header = f"{'':>6}" + "".join(f"{c:>12}" for c in CURRENCIES)
-    print(header)
-    for a in CURRENCIES:
-        row = f"{a:>6}"
-        for b in CURRENCIES:
-            rate = matrix.get((a, b), 0)
-            row += f"{rate:>12.4f}"
-        print(row)
+    lines = [
+        f"\nRate date: {sample_date}",
+        "\n--- Exchange Rate Matrix ---",
+        f"{'':>6}" + "".join(f"{c:>12}" for c in CURRENCIES),
+    ]
+    for a, rates in zip(CURRENCIES, matrix):
+        lines.append(f"{a:>6}" + "".join(f"{rate or 0:>12.4f}" for rate in rates))
+    emit(*lines)
 
     # Step 2: Find triangular arbitrage
-    print("\n--- Triangular Arbitrage Analysis (starting with $10,000) ---")
-    results = find_triangular_arbitrage(CURRENCIES, matrix)
+    top, summary = find_triangular_arbitrage(CURRENCIES, matrix)
 
     # Show top 20 results
-    print(f"\nTop 20 paths by absolute profit:")
-    print(f"{'Path':<30} {'Product':>10} {'End ($)':>12} {'Profit ($)':>12} {'Profit %':>10}")
-    print("-" * 76)
-    for r in results[:20]:
-        print(f"{r['path']:<30} {r['product']:>10.6f} {r['end']:>12.4f} {r['profit']:>12.4f} {r['profit_pct']:>10.6f}")
+    lines = [
+        "\n--- Triangular Arbitrage Analysis (starting with $10,000) ---",
+        f"\nTop 20 paths by absolute profit:",
+        f"{'Path':<30} {'Product':>10} {'End ($)':>12} {'Profit ($)':>12} {'Profit %':>10}",
+        "-" * 76,
+    ]
+    for r in top:
+        lines.append(f"{r['path']:<30} {r['product']:>10.6f} {r['end']:>12.4f} {r['profit']:>12.4f} {r['profit_pct']:>10.6f}")
+    emit(*lines)
 
     # Step 3: Bellman-Ford negative cycle detection
-    print("\n--- Bellman-Ford Negative Cycle Detection ---")
     cycles = find_negative_cycles_bellman_ford(CURRENCIES, matrix)
+    lines = ["\n--- Bellman-Ford Negative Cycle Detection ---"]
     if cycles:
-        print(f"Found {len(cycles)} negative cycle indicators:")
+        lines.append(f"Found {len(cycles)} negative cycle(s):")
         for c in cycles[:10]:
-            print(f"  Source: {c['source']}, Edge: {c['detected_at']}, Improvement: {c['improvement']:.8f}")
+            path = " -> ".join(c["cycle"] + c["cycle"][:1])
+            lines.append(f"  Cycle: {path}, Improvement: {c['improvement']:.8f}")
     else:
-        print("No negative cycles detected (market is arbitrage-free at this snapshot)")
+        lines.append("No negative cycles detected (market is arbitrage-free at this snapshot)")
+    emit(*lines)
 
     # Step 4: Summary
-    print("\n--- Summary ---")
-    profitable = [r for r in results if r["profit"] > 0]
-    if profitable:
-        best = profitable[0]
-        print(f"Best path: {best['path']}")
-        print(f"  Product: {best['product']:.8f} (should be 1.0 if no arbitrage)")
-        print(f"  Start: ${best['start']:,.2f}")
-        print(f"  End:   ${best['end']:,.2f}")
-        print(f"  Profit: ${best['profit']:,.4f} ({best['profit_pct']:.6f}%)")
-        print(f"  Rates: {best['rates']}")
-
-        print(f"\nTotal profitable paths: {len(profitable)} out of {len(results)}")
-        total_range = max(r['profit_pct'] for r in results) - min(r['profit_pct'] for r in results)
-        print(f"Profit range: {min(r['profit_pct'] for r in results):.6f}% to {max(r['profit_pct'] for r in results):.6f}%")
+    best = summary["best"]
+    if best:
+        emit(
+            "\n--- Summary ---",
+            f"Best path: {best['path']}",
+            f"  Product: {best['product']:.8f} (should be 1.0 if no arbitrage)",
+            f"  Start: ${best['start']:,.2f}",
+            f"  End:   ${best['end']:,.2f}",
+            f"  Profit: ${best['profit']:,.4f} ({best['profit_pct']:.6f}%)",
+            f"  Rates: {best['rates']}",
+            f"\nTotal profitable paths: {summary['profitable']} out of {summary['paths']}",
+            f"Profit range: {summary['min_pct']:.6f}% to {summary['max_pct']:.6f}%",
+        )
     else:
-        print("No profitable triangular arbitrage paths found at current rates.")
-        print("(This is expected for ECB daily rates — differentials exist at the tick level)")
+        emit(
+            "\n--- Summary ---",
+            "No profitable triangular arbitrage paths found at current rates.",
+            "(This is expected for ECB daily rates — differentials exist at the tick level)",
+        )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,14 @@
+"""
+Output
+======
+Console output helper shared by detect_arbitrage.py, single_leg_analysis.py
+and roi_analysis.py. Kept apart from rates_client.py so the pure-calculation
+ROI script does not pull in the network code.
+"""
+
+import sys
+
+
+def emit(*lines):
+    """Write a block of output lines with a single stdout write"""
+    sys.stdout.write("\n".join(lines) + "\n")
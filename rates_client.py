@@ -0,0 +1,155 @@
+"""
+Rates Client
+============
+Shared rate fetching for detect_arbitrage.py and single_leg_analysis.py.
+
+- Rates come from frankfurter.app (ECB data, free, no API key)
+- Per-base requests run concurrently; --derive mode makes one request
+- Raw responses are cached on disk per calendar day, and built matrices
+  are memoized per process by get_matrix()
+
+Matrices are lists of rows indexed like the `currencies` argument:
+matrix[i][j] is the rate from currencies[i] to currencies[j], or None
+if the API didn't quote it.
+"""
+
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+
+# ECB publishes once per business day, so fetched rates are cached per calendar day
+CACHE_DIR = Path("~/.cache/tri_arb").expanduser()
+
+# Before ECB publishes (~16:00 CET) the API still serves the previous business
+# day's rates; a cache holding those is only reused for this many seconds
+CACHE_MAX_AGE = 3600
+
+def fetch_rates(base, targets):
+    """Fetch exchange rates from frankfurter.app"""
+    symbols = ",".join(targets)
+    url = f"https://api.frankfurter.dev/v1/latest?base={base}&symbols={symbols}"
+    req = urllib.request.Request(url, headers={"User-Agent": "Python/3"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        data = json.loads(resp.read().decode())
+    return data
+
+def _cache_path(name):
+    return CACHE_DIR / f"{name}_{date.today().isoformat()}.json"
+
+def load_cached_rates(name, currencies, bases):
+    """
+    Return today's cached raw API responses for `currencies`, or None on a miss.
+    A hit needs a response for every currency in `bases`, and either rates
+    dated today or a cache file younger than CACHE_MAX_AGE.
+    """
+    path = _cache_path(name)
+    try:
+        cached = json.loads(path.read_text())
+        age = time.time() - path.stat().st_mtime
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("currencies") != list(currencies):
+        return None
+
+    raw = cached.get("raw")
+    if not isinstance(raw, dict):
+        return None
+    for base in bases:
+        if not isinstance(raw.get(base), dict) or not isinstance(raw[base].get("rates"), dict):
+            return None
+
+    today = date.today().isoformat()
+    if age >= CACHE_MAX_AGE and any(raw[base].get("date") != today for base in bases):
+        return None
+    return raw
+
+def save_cached_rates(name, currencies, raw_data):
+    """Write raw API responses to today's cache file (atomic replace, best effort)"""
+    path = _cache_path(name)
+    tmp = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps({"currencies": list(currencies), "raw": raw_data}))
+        tmp.replace(path)
+    except OSError:
+        pass
+
+def build_rate_matrix(currencies, refresh=False):
+    """
+    Build full NxN rate matrix by fetching rates for each base currency.
+    The per-base requests are independent, so they run concurrently --
+    wall time is roughly one round-trip instead of N.
+    Responses are cached for the day; `refresh` forces a re-fetch.
+    """
+    raw_data = None if refresh else load_cached_rates("rates", currencies, currencies)
+
+    if raw_data is None:
+        raw_data = {}
+        with ThreadPoolExecutor(max_workers=len(currencies)) as executor:
+            futures = {}
+            for base in currencies:
+                targets = [c for c in currencies if c != base]
+                print(f"  Fetching rates for base: {base}...")
+                futures[executor.submit(fetch_rates, base, targets)] = base
+
+            for future in as_completed(futures):
+                raw_data[futures[future]] = future.result()
+        save_cached_rates("rates", currencies, raw_data)
+    else:
+        print("  Using today's cached rates (--refresh to re-fetch)")
+
+    n = len(currencies)
+    idx = {c: i for i, c in enumerate(currencies)}
+    matrix = [[None] * n for _ in range(n)]
+    for i, base in enumerate(currencies):
+        matrix[i][i] = 1.0
+        for target, rate in raw_data[base]["rates"].items():
+            if target in idx:
+                matrix[i][idx[target]] = rate
+
+    return matrix, raw_data
+
+def derive_rate_matrix(currencies, base="EUR", refresh=False):
+    """
+    Build the NxN matrix from a single request.
+    ECB publishes every rate against EUR, so each cross-rate follows by
+    division: rate(A->B) = rate(base->B) / rate(base->A).
+    The result is triangulation-consistent by construction -- every loop
+    product is 1.0 up to float rounding, so any differential seen with the
+    per-base matrix is quoting noise from the API.
+    """
+    raw_data = None if refresh else load_cached_rates(f"rates_{base}", currencies, [base])
+
+    if raw_data is None:
+        print(f"  Fetching rates for base: {base}...")
+        raw_data = {base: fetch_rates(base, [c for c in currencies if c != base])}
+        save_cached_rates(f"rates_{base}", currencies, raw_data)
+    else:
+        print("  Using today's cached rates (--refresh to re-fetch)")
+
+    ref = dict(raw_data[base]["rates"])
+    ref[base] = 1.0
+
+    matrix = [[ref[b] / ref[a] for b in currencies] for a in currencies]
+
+    return matrix, raw_data
+
+# (currencies, derive) -> (matrix, raw_data) for this process
+_matrices = {}
+
+def get_matrix(currencies, derive=False, refresh=False):
+    """
+    Return (matrix, raw_data) for `currencies`, building it at most once per
+    process: running both analyses in one interpreter fetches once.
+    `derive` selects derive_rate_matrix over build_rate_matrix; `refresh`
+    bypasses both the in-process memo and the on-disk cache.
+    The returned matrix is shared -- treat it as read-only.
+    """
+    key = (tuple(currencies), derive)
+    if refresh or key not in _matrices:
+        build = derive_rate_matrix if derive else build_rate_matrix
+        _matrices[key] = build(list(currencies), refresh=refresh)
+    return _matrices[key]
@@ -7,6 +7,11 @@ for three approaches: Traditional Forex, Centralized Crypto, DeFi On-Chain.
 All figures sourced from 2025-2026 market research.
 """
 
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from output import emit
+
 def format_usd(amount):
     return f"${amount:,.2f}"
 
@@ -20,56 +25,94 @@ def months_to_breakeven(total_investment, monthly_profit):
         return float('inf')
     return total_investment / monthly_profit
 
-def print_scenario(name, upfront, monthly_costs, monthly_revenue, notes):
-    print(f"\n{'='*70}")
-    print(f"  {name}")
-    print(f"{'='*70}")
-
-    annual_costs = monthly_costs * 12
-    annual_revenue = monthly_revenue * 12
-    annual_profit = annual_revenue - annual_costs
-    total_first_year = upfront + annual_costs
-    first_year_profit = annual_revenue - total_first_year
-    roi = annual_roi(annual_profit, total_first_year) if first_year_profit != annual_profit else annual_roi(annual_profit, annual_costs)
-    breakeven = months_to_breakeven(upfront, monthly_revenue - monthly_costs)
-
-    print(f"\n  COSTS:")
-    for label, amount in upfront.items() if isinstance(upfront, dict) else [("Upfront Total", upfront)]:
-        pass
-
-    print(f"  {'Upfront Investment:':<35} {format_usd(upfront):>15}")
-    print(f"  {'Monthly Operating Costs:':<35} {format_usd(monthly_costs):>15}")
-    print(f"  {'Annual Operating Costs:':<35} {format_usd(annual_costs):>15}")
-    print(f"  {'Total First Year Cost:':<35} {format_usd(total_first_year):>15}")
-
-    print(f"\n  REVENUE:")
-    print(f"  {'Monthly Revenue (est):':<35} {format_usd(monthly_revenue):>15}")
-    print(f"  {'Annual Revenue (est):':<35} {format_usd(annual_revenue):>15}")
-
-    print(f"\n  PROFIT:")
-    print(f"  {'Monthly Profit:':<35} {format_usd(monthly_revenue - monthly_costs):>15}")
-    print(f"  {'First Year Profit:':<35} {format_usd(first_year_profit):>15}")
-    print(f"  {'Annual Profit (year 2+):':<35} {format_usd(annual_profit):>15}")
-
-    print(f"\n  ROI:")
-    if breakeven < float('inf'):
-        print(f"  {'Months to Break Even:':<35} {breakeven:>15.1f}")
+@dataclass
+class Scenario:
+    """One business case. Derived figures are computed once, on first use."""
+    name: str
+    upfront: float
+    monthly_costs: float
+    monthly_revenue: float
+    capital: float = 0
+    notes: list = field(default_factory=list)
+
+    @cached_property
+    def monthly_profit(self):
+        return self.monthly_revenue - self.monthly_costs
+
+    @cached_property
+    def annual_costs(self):
+        return self.monthly_costs * 12
+
+    @cached_property
+    def annual_revenue(self):
+        return self.monthly_revenue * 12
+
+    @cached_property
+    def annual_profit(self):
+        return self.annual_revenue - self.annual_costs
+
+    @cached_property
+    def total_first_year(self):
+        return self.upfront + self.annual_costs
+
+    @cached_property
+    def first_year_profit(self):
+        return self.annual_revenue - self.total_first_year
+
+    @cached_property
+    def first_year_roi(self):
+        # Year one carries the upfront investment
+        return annual_roi(self.first_year_profit, self.total_first_year)
+
+    @cached_property
+    def ongoing_roi(self):
+        # Year two onward: operating costs only
+        return annual_roi(self.annual_profit, self.annual_costs)
+
+    @cached_property
+    def breakeven(self):
+        return months_to_breakeven(self.upfront, self.monthly_profit)
+
+def print_scenario(s):
+    """Render one scenario and write it in one go."""
+    lines = [
+        f"\n{'='*70}",
+        f"  {s.name}",
+        f"{'='*70}",
+        f"\n  COSTS:",
+        f"  {'Upfront Investment:':<35} {format_usd(s.upfront):>15}",
+        f"  {'Monthly Operating Costs:':<35} {format_usd(s.monthly_costs):>15}",
+        f"  {'Annual Operating Costs:':<35} {format_usd(s.annual_costs):>15}",
+        f"  {'Total First Year Cost:':<35} {format_usd(s.total_first_year):>15}",
+        f"\n  REVENUE:",
+        f"  {'Monthly Revenue (est):':<35} {format_usd(s.monthly_revenue):>15}",
+        f"  {'Annual Revenue (est):':<35} {format_usd(s.annual_revenue):>15}",
+        f"\n  PROFIT:",
+        f"  {'Monthly Profit:':<35} {format_usd(s.monthly_profit):>15}",
+        f"  {'First Year Profit:':<35} {format_usd(s.first_year_profit):>15}",
+        f"  {'Annual Profit (year 2+):':<35} {format_usd(s.annual_profit):>15}",
+        f"\n  ROI:",
+    ]
+    if s.breakeven < float('inf'):
+        lines.append(f"  {'Months to Break Even:':<35} {s.breakeven:>15.1f}")
     else:
-        print(f"  {'Months to Break Even:':<35} {'NEVER':>15}")
-    print(f"  {'First Year ROI:':<35} {(first_year_profit/total_first_year*100):>14.1f}%")
-    if annual_costs > 0:
-        print(f"  {'Ongoing Annual ROI:':<35} {(annual_profit/annual_costs*100):>14.1f}%")
+        lines.append(f"  {'Months to Break Even:':<35} {'NEVER':>15}")
+    lines.append(f"  {'First Year ROI:':<35} {s.first_year_roi:>14.1f}%")
+    if s.annual_costs > 0:
+        lines.append(f"  {'Ongoing Annual ROI:':<35} {s.ongoing_roi:>14.1f}%")
 
-    print(f"\n  NOTES:")
-    for note in notes:
-        print(f"  - {note}")
+    lines.append(f"\n  NOTES:")
+    lines.extend(f"  - {note}" for note in s.notes)
+    emit(*lines)
 
 def main():
-    print("=" * 70)
-    print("  ARBITRAGE ROI ANALYSIS — REAL COST COMPARISON")
-    print("=" * 70)
-    print(f"\n  Based on research from 2025-2026 market data")
-    print(f"  All revenue estimates are CONSERVATIVE scenarios")
+    emit(
+        "=" * 70,
+        "  ARBITRAGE ROI ANALYSIS — REAL COST COMPARISON",
+        "=" * 70,
+        f"\n  Based on research from 2025-2026 market data",
+        f"  All revenue estimates are CONSERVATIVE scenarios",
+    )
 
     # =========================================================
     # SCENARIO 1: Traditional Forex (Institutional)
@@ -93,11 +136,12 @@ def main():
     forex_trading_days = 22
     forex_monthly_rev = forex_net_per_trade * forex_trades_per_day * forex_trading_days
 
-    print_scenario(
+    forex = Scenario(
         "SCENARIO 1: Traditional Forex (Institutional)",
         forex_upfront,
         forex_monthly,
         forex_monthly_rev,
+        forex_capital,
         [
             f"Trading capital required: {format_usd(forex_capital)} (not included in upfront — it's working capital)",
             f"License: Cayman Islands ($125K min capital requirement)",
@@ -111,6 +155,7 @@ def main():
             f"RISK: Regulatory compliance ongoing costs not modeled",
         ]
     )
+    print_scenario(forex)
 
     # =========================================================
     # SCENARIO 2: Centralized Crypto Exchange Arbitrage
@@ -132,11 +177,12 @@ def main():
     crypto_cex_trades_per_day = 3
     crypto_cex_monthly_rev = crypto_cex_net_per_trade * crypto_cex_trades_per_day * 30
 
-    print_scenario(
+    crypto_cex = Scenario(
         "SCENARIO 2: Centralized Crypto (Cross-Exchange)",
         crypto_cex_upfront,
         crypto_cex_monthly,
         crypto_cex_monthly_rev,
+        crypto_cex_capital,
         [
             f"Trading capital required: {format_usd(crypto_cex_capital)} split across exchanges",
             f"No license needed — retail access sufficient",
@@ -150,6 +196,7 @@ def main():
             f"RISK: 86% of crypto trading already automated — competitive",
         ]
     )
+    print_scenario(crypto_cex)
 
     # =========================================================
     # SCENARIO 3: DeFi On-Chain (Solana)
@@ -172,11 +219,12 @@ def main():
     # Assume 10 successful arbs/day, $2 net each after gas/tips
     defi_monthly_rev = 10 * 2 * 30  # $600/month
 
-    print_scenario(
+    defi = Scenario(
         "SCENARIO 3: DeFi On-Chain (Solana + Flash Loans)",
         defi_upfront,
         defi_monthly,
         defi_monthly_rev,
+        0,
         [
             f"NO trading capital needed — flash loans borrow and repay in same tx",
             f"Solana gas: ~$0.00025 per transaction",
@@ -192,6 +240,7 @@ def main():
             f"UPSIDE: Failed trades cost almost nothing (reverted tx = just gas)",
         ]
     )
+    print_scenario(defi)
 
     # =========================================================
     # SCENARIO 4: DeFi On-Chain (Solana) — Optimistic
@@ -201,11 +250,12 @@ def main():
     # If we find a niche pair/pool with less competition: 20 arbs/day, $5 net
     defi_opt_monthly_rev = 20 * 5 * 30  # $3,000/month
 
-    print_scenario(
+    defi_opt = Scenario(
         "SCENARIO 4: DeFi On-Chain (Solana) — Optimistic Niche",
         defi_opt_upfront,
         defi_opt_monthly,
         defi_opt_monthly_rev,
+        0,
         [
             f"Same infrastructure as Scenario 3",
             f"Assumes discovery of less-competitive token pairs/pools",
@@ -216,35 +266,38 @@ def main():
             f"UPSIDE: First-mover advantage in new token launches/pools",
         ]
     )
+    print_scenario(defi_opt)
 
     # =========================================================
     # COMPARISON SUMMARY
     # =========================================================
-    print(f"\n{'='*70}")
-    print(f"  COMPARISON SUMMARY")
-    print(f"{'='*70}")
-
     scenarios = [
-        ("Forex Institutional",    forex_upfront, forex_monthly, forex_monthly_rev, forex_capital),
-        ("Crypto CEX",             crypto_cex_upfront, crypto_cex_monthly, crypto_cex_monthly_rev, crypto_cex_capital),
-        ("DeFi Solana (Conservative)", defi_upfront, defi_monthly, defi_monthly_rev, 0),
-        ("DeFi Solana (Optimistic)",   defi_opt_upfront, defi_opt_monthly, defi_opt_monthly_rev, 0),
+        ("Forex Institutional",        forex),
+        ("Crypto CEX",                 crypto_cex),
+        ("DeFi Solana (Conservative)", defi),
+        ("DeFi Solana (Optimistic)",   defi_opt),
+    ]
+
+    rows = [
+        f"\n{'='*70}",
+        f"  COMPARISON SUMMARY",
+        f"{'='*70}",
+        f"\n  {'Scenario':<28} {'Upfront':>10} {'Monthly$':>10} {'Mo.Rev':>10} {'Mo.Profit':>10} {'Capital':>10} {'Breakeven':>10}",
+        f"  {'-'*88}",
     ]
+    for name, s in scenarios:
+        be_str = f"{s.breakeven:.1f}mo" if s.breakeven < float('inf') else "NEVER"
+        rows.append(f"  {name:<28} {format_usd(s.upfront):>10} {format_usd(s.monthly_costs):>10} {format_usd(s.monthly_revenue):>10} {format_usd(s.monthly_profit):>10} {format_usd(s.capital):>10} {be_str:>10}")
 
-    print(f"\n  {'Scenario':<28} {'Upfront':>10} {'Monthly$':>10} {'Mo.Rev':>10} {'Mo.Profit':>10} {'Capital':>10} {'Breakeven':>10}")
-    print(f"  {'-'*88}")
-    for name, up, mc, mr, cap in scenarios:
-        mp = mr - mc
-        be = months_to_breakeven(up, mp) if mp > 0 else float('inf')
-        be_str = f"{be:.1f}mo" if be < float('inf') else "NEVER"
-        print(f"  {name:<28} {format_usd(up):>10} {format_usd(mc):>10} {format_usd(mr):>10} {format_usd(mp):>10} {format_usd(cap):>10} {be_str:>10}")
-
-    print(f"\n  KEY INSIGHT:")
-    print(f"  DeFi on Solana has the lowest barrier to entry by far.")
-    print(f"  Flash loans eliminate the need for trading capital.")
-    print(f"  Failed trades simply revert — you only pay gas (~$0.00025).")
-    print(f"  The question is whether you can find profitable arbs in a")
-    print(f"  market where 86% of trading is already automated.")
+    rows += [
+        f"\n  KEY INSIGHT:",
+        f"  DeFi on Solana has the lowest barrier to entry by far.",
+        f"  Flash loans eliminate the need for trading capital.",
+        f"  Failed trades simply revert — you only pay gas (~$0.00025).",
+        f"  The question is whether you can find profitable arbs in a",
+        f"  market where 86% of trading is already automated.",
+    ]
+    emit(*rows)
 
 if __name__ == "__main__":
     main()
@@ -14,87 +14,67 @@ For each pair (A, B):
 This is 1/3 the transaction cost of full triangular arbitrage.
 """
 
-import urllib.request
-import json
-from itertools import permutations
+import argparse
+import heapq
 
-CURRENCIES = ["USD", "EUR", "GBP", "MXN", "JPY", "CHF", "CAD", "AUD"]
+from output import emit
+from rates_client import get_matrix
 
-def fetch_rates(base, targets):
-    symbols = ",".join(targets)
-    url = f"https://api.frankfurter.dev/v1/latest?base={base}&symbols={symbols}"
-    req = urllib.request.Request(url, headers={"User-Agent": "Python/3"})
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        data = json.loads(resp.read().decode())
-    return data
-
-def build_rate_matrix(currencies):
-    matrix = {}
-    for base in currencies:
-        targets = [c for c in currencies if c != base]
-        print(f"  Fetching rates for base: {base}...")
-        data = fetch_rates(base, targets)
-        matrix[(base, base)] = 1.0
-        for target, rate in data["rates"].items():
-            if target in currencies:
-                matrix[(base, target)] = rate
-    return matrix
+CURRENCIES = ["USD", "EUR", "GBP", "MXN", "JPY", "CHF", "CAD", "AUD"]
 
 def analyze_single_leg(currencies, matrix):
     """
     For each direct pair, compare actual rate vs all implied cross rates.
     Find the pairs with the largest deviation.
+    `matrix` is indexed by currency position, so the implied rates for a
+    pair are one comprehension over intermediaries.
+    Results come back in pair order; rank them with heapq.nlargest.
     """
+    n = len(currencies)
     results = []
 
-    for a in currencies:
-        for b in currencies:
-            if a == b:
+    for i, a in enumerate(currencies):
+        row = matrix[i]
+        for j, b in enumerate(currencies):
+            if i == j:
                 continue
 
-            actual = matrix.get((a, b))
+            actual = row[j]
             if actual is None:
                 continue
 
-            # Calculate implied rate via every intermediary
-            implied_rates = []
-            for c in currencies:
-                if c == a or c == b:
-                    continue
-                rate_ac = matrix.get((a, c))
-                rate_cb = matrix.get((c, b))
-                if rate_ac and rate_cb:
-                    implied = rate_ac * rate_cb
-                    implied_rates.append({
-                        "via": c,
-                        "implied": implied,
-                        "rate_ac": rate_ac,
-                        "rate_cb": rate_cb,
-                    })
+            # Implied rate via every intermediary: rate(A->C) * rate(C->B)
+            implied_rates = [
+                (k, row[k] * matrix[k][j])
+                for k in range(n)
+                if k != i and k != j and row[k] and matrix[k][j]
+            ]
 
             if not implied_rates:
                 continue
 
             # Average implied rate across all intermediaries
-            avg_implied = sum(r["implied"] for r in implied_rates) / len(implied_rates)
+            avg_implied = sum(imp for _, imp in implied_rates) / len(implied_rates)
             deviation_pct = ((actual - avg_implied) / avg_implied) * 100
 
             # Best single intermediary (largest deviation from actual)
-            best_via = max(implied_rates, key=lambda r: abs(actual - r["implied"]))
-            best_deviation = ((actual - best_via["implied"]) / best_via["implied"]) * 100
+            best_k, best_implied = max(implied_rates, key=lambda r: abs(actual - r[1]))
+            best_deviation = ((actual - best_implied) / best_implied) * 100
 
             results.append({
                 "pair": f"{a}/{b}",
                 "actual": actual,
                 "avg_implied": round(avg_implied, 6),
                 "deviation_pct": round(deviation_pct, 6),
-                "best_via": best_via["via"],
-                "best_implied": round(best_via["implied"], 6),
+                "best_via": currencies[best_k],
+                "best_implied": round(best_implied, 6),
                 "best_deviation_pct": round(best_deviation, 6),
-                "all_implied": implied_rates,
+                "all_implied": [
+                    {"via": currencies[k], "implied": imp, "rate_ac": row[k], "rate_cb": matrix[k][j]}
+                    for k, imp in implied_rates
+                ],
             })
 
-    results.sort(key=lambda x: abs(x["deviation_pct"]), reverse=True)
     return results
 
 def analyze_profitability(results, trade_amount=100000):
@@ -104,9 +84,11 @@ def analyze_profitability(results, trade_amount=100000):
     - Break-even spread (what spread would eat all the profit)
     - Required volume at various spread levels
     """
-    print(f"\n--- Profitability Analysis (trade amount: ${trade_amount:,.0f}) ---")
-    print(f"{'Pair':<10} {'Deviation%':>12} {'Gross Profit':>14} {'Break-Even Spread':>20} {'Direction':<10}")
-    print("-" * 70)
+    lines = [
+        f"\n--- Profitability Analysis (trade amount: ${trade_amount:,.0f}) ---",
+        f"{'Pair':<10} {'Deviation%':>12} {'Gross Profit':>14} {'Break-Even Spread':>20} {'Direction':<10}",
+        "-" * 70,
+    ]
 
     for r in results[:20]:
         dev = r["deviation_pct"]
@@ -119,62 +101,84 @@ def analyze_profitability(results, trade_amount=100000):
         # On a single leg, spread cost = trade_amount * spread_pct
         break_even_spread_pct = abs(dev)
 
-        print(f"{r['pair']:<10} {dev:>12.6f} ${gross_profit:>13.2f} {break_even_spread_pct:>19.6f}% {direction:<10}")
+        lines.append(f"{r['pair']:<10} {dev:>12.6f} ${gross_profit:>13.2f} {break_even_spread_pct:>19.6f}% {direction:<10}")
+    emit(*lines)
 
     # Typical spread analysis
-    print(f"\n--- Spread Reality Check ---")
-    print(f"Typical retail spreads:")
-    print(f"  EUR/USD: ~0.008% (0.8 pips)")
-    print(f"  USD/JPY: ~0.010% (1.0 pips)")
-    print(f"  GBP/USD: ~0.012% (1.2 pips)")
-    print(f"  USD/MXN: ~0.030% (3.0 pips)")
-    print(f"  Exotic pairs: ~0.050-0.100%")
-    print(f"\nTypical institutional spreads:")
-    print(f"  Major pairs: ~0.001-0.003%")
-    print(f"  Minor pairs: ~0.005-0.015%")
-    print(f"  Exotic pairs: ~0.015-0.050%")
+    emit(
+        f"\n--- Spread Reality Check ---",
+        f"Typical retail spreads:",
+        f"  EUR/USD: ~0.008% (0.8 pips)",
+        f"  USD/JPY: ~0.010% (1.0 pips)",
+        f"  GBP/USD: ~0.012% (1.2 pips)",
+        f"  USD/MXN: ~0.030% (3.0 pips)",
+        f"  Exotic pairs: ~0.050-0.100%",
+        f"\nTypical institutional spreads:",
+        f"  Major pairs: ~0.001-0.003%",
+        f"  Minor pairs: ~0.005-0.015%",
+        f"  Exotic pairs: ~0.015-0.050%",
+    )
 
 def main():
-    print("=" * 70)
-    print("SINGLE-LEG ARBITRAGE ANALYSIS")
-    print("=" * 70)
-    print(f"\nCurrencies: {', '.join(CURRENCIES)}")
+    parser = argparse.ArgumentParser(description="Single-leg arbitrage analysis")
+    parser.add_argument("--derive", action="store_true",
+                        help="fetch EUR rates once and derive all cross-rates by division")
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignore today's cached rates and re-fetch")
+    args = parser.parse_args()
+
+    emit(
+        "=" * 70,
+        "SINGLE-LEG ARBITRAGE ANALYSIS",
+        "=" * 70,
+        f"\nCurrencies: {', '.join(CURRENCIES)}",
+    )
 
     print("\n--- Fetching Live Rates ---")
-    matrix = build_rate_matrix(CURRENCIES)
+    matrix, _ = get_matrix(CURRENCIES, derive=args.derive, refresh=args.refresh)
 
-    print("\n--- Cross-Rate Deviation Analysis ---")
     results = analyze_single_leg(CURRENCIES, matrix)
-
-    print(f"\nTop 20 pairs by deviation from implied cross-rate:")
-    print(f"{'Pair':<10} {'Actual':>12} {'Avg Implied':>12} {'Deviation%':>12} {'Best Via':>10} {'Best Dev%':>12}")
-    print("-" * 70)
-    for r in results[:20]:
-        print(f"{r['pair']:<10} {r['actual']:>12.6f} {r['avg_implied']:>12.6f} {r['deviation_pct']:>12.6f} {r['best_via']:>10} {r['best_deviation_pct']:>12.6f}")
+    top = heapq.nlargest(20, results, key=lambda x: abs(x["deviation_pct"]))
+
+    lines = [
+        "\n--- Cross-Rate Deviation Analysis ---",
+        f"\nTop 20 pairs by deviation from implied cross-rate:",
+        f"{'Pair':<10} {'Actual':>12} {'Avg Implied':>12} {'Deviation%':>12} {'Best Via':>10} {'Best Dev%':>12}",
+        "-" * 70,
+    ]
+    for r in top:
+        lines.append(f"{r['pair']:<10} {r['actual']:>12.6f} {r['avg_implied']:>12.6f} {r['deviation_pct']:>12.6f} {r['best_via']:>10} {r['best_deviation_pct']:>12.6f}")
+    emit(*lines)
 
     # Detailed breakdown of the most mispriced pair
-    best = results[0]
-    print(f"\n--- Detailed Breakdown: {best['pair']} ---")
-    print(f"Actual rate: {best['actual']}")
-    print(f"Average implied rate: {best['avg_implied']}")
-    print(f"Deviation: {best['deviation_pct']}%")
-    print(f"\nImplied rates via each intermediary:")
+    best = top[0]
+    lines = [
+        f"\n--- Detailed Breakdown: {best['pair']} ---",
+        f"Actual rate: {best['actual']}",
+        f"Average implied rate: {best['avg_implied']}",
+        f"Deviation: {best['deviation_pct']}%",
+        f"\nImplied rates via each intermediary:",
+    ]
     for imp in sorted(best["all_implied"], key=lambda x: abs(best["actual"] - x["implied"]), reverse=True):
         dev = ((best["actual"] - imp["implied"]) / imp["implied"]) * 100
-        print(f"  via {imp['via']:>4}: {imp['implied']:>12.6f} (deviation: {dev:>+.6f}%)")
+        lines.append(f"  via {imp['via']:>4}: {imp['implied']:>12.6f} (deviation: {dev:>+.6f}%)")
+    emit(*lines)
 
-    analyze_profitability(results)
+    analyze_profitability(top)
 
     # Summary
-    print(f"\n--- Key Findings ---")
     above_retail = [r for r in results if abs(r["deviation_pct"]) > 0.03]
     above_institutional = [r for r in results if abs(r["deviation_pct"]) > 0.005]
-    print(f"Pairs with deviation > retail spread (0.03%): {len(above_retail)}")
-    print(f"Pairs with deviation > institutional spread (0.005%): {len(above_institutional)}")
+    lines = [
+        f"\n--- Key Findings ---",
+        f"Pairs with deviation > retail spread (0.03%): {len(above_retail)}",
+        f"Pairs with deviation > institutional spread (0.005%): {len(above_institutional)}",
+    ]
     if above_institutional:
-        print(f"\nPotentially profitable at institutional level:")
-        for r in above_institutional[:10]:
-            print(f"  {r['pair']}: {r['deviation_pct']:+.6f}% (via {r['best_via']})")
+        lines.append(f"\nPotentially profitable at institutional level:")
+        for r in [r for r in top if abs(r["deviation_pct"]) > 0.005][:10]:
+            lines.append(f"  {r['pair']}: {r['deviation_pct']:+.6f}% (via {r['best_via']})")
+    emit(*lines)
 
 if __name__ == "__main__":
     main()